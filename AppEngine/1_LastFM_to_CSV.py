@@ -1,6 +1,9 @@
 import os
+import sys
 import csv
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import time
 from dotenv import load_dotenv
@@ -8,16 +11,28 @@ import pylast
 import requests
 import sqlite3
 
+# Include parent directory in sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Logic import scrobble_db
+
 # Load Last.fm API credentials from .env
 load_dotenv()
 API_KEY = os.getenv("LASTFM_API_KEY")
 API_SECRET = os.getenv("LASTFM_API_SECRET")
 USERNAME = os.getenv("LASTFM_USERNAME")
 PASSWORD_HASH = os.getenv("LASTFM_PASSWORD")
+# Extra household/team accounts, comma separated (e.g. "alice,bob")
+EXTRA_USERNAMES = [u.strip() for u in os.getenv("LASTFM_USERNAMES", "").split(",") if u.strip()]
+# How many accounts sync at once; they all share one API key and its rate limit
+PARALLEL_SYNCS = max(int(os.getenv("LASTFM_PARALLEL_SYNCS", "2")), 1)
+# Last.fm limit is 200/minute per API key, staying just under it.
+# Parallel syncs each get an equal share through this variable.
+REQUESTS_PER_MINUTE = max(int(os.getenv("LASTFM_REQUESTS_PER_MINUTE", "180")), 1)
 
-if not all([API_KEY, API_SECRET, USERNAME]):
+if not all([API_KEY, API_SECRET]) or not (USERNAME or EXTRA_USERNAMES or len(sys.argv) > 1):
     print("[!] Missing Last.fm API credentials in .env file")
-    print("Required variables: LASTFM_API_KEY, LASTFM_API_SECRET, LASTFM_USERNAME")
+    print("Required variables: LASTFM_API_KEY, LASTFM_API_SECRET, LASTFM_USERNAME (or LASTFM_USERNAMES)")
     input("Press Enter to exit...")
     exit(1)
 
@@ -29,14 +44,13 @@ network = pylast.LastFMNetwork(
 )
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "..", "DataBases", "All_Scrobble_DataBase.db")
 
-def show_latest_db_played_time():
-    if not os.path.exists(DB_PATH):
+def show_latest_db_played_time(db_path):
+    if not os.path.exists(db_path):
         print("\n[📅] Database not found.")
         return
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         cursor.execute("SELECT `Played Time` FROM scrobbles ORDER BY `Played Time` DESC LIMIT 1")
         row = cursor.fetchone()
@@ -57,9 +71,9 @@ def parse_date_or_datetime(dt_str, is_start=True):
         dt = dt.replace(hour=0, minute=1, second=0) if is_start else dt.replace(hour=23, minute=59, second=59)
     return int(dt.timestamp())
 
-def get_next_time_range():
+def get_next_time_range(db_path):
     """Get the next 24-hour range that needs to be fetched."""
-    if not os.path.exists(DB_PATH):
+    if not os.path.exists(db_path):
         print("\n[!] Database not found. Will start from last 24 hours.")
         end_date = datetime.now()
         start_date = end_date - timedelta(hours=24)
@@ -67,7 +81,7 @@ def get_next_time_range():
     
     try:
         current_time = datetime.now()
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         cursor.execute("SELECT `Played Time` FROM scrobbles ORDER BY `Played Time` DESC LIMIT 1")
         row = cursor.fetchone()
@@ -113,8 +127,7 @@ def fetch_all_scrobbles(user, time_from=None, time_to=None):
     total_tracks = None
     
     # Rate limiting settings
-    requests_per_minute = 180  # Last.fm limit is 200/minute, staying just under it
-    delay_between_requests = 60 / requests_per_minute  # ~0.33 seconds between requests
+    delay_between_requests = 60 / REQUESTS_PER_MINUTE  # ~0.33 seconds between requests for one sync
     
     while True:
         try:
@@ -248,9 +261,79 @@ def save_csv(scrobbles, csv_filename):
         writer.writerows(scrobbles)
     print(f"[✓] CSV file saved: {csv_filename}")
 
+def get_usernames():
+    """Usernames to sync: command-line arguments, else the .env accounts.
+
+    Last.fm usernames are case-insensitive, so "Alice" and "alice" are one account.
+    """
+    if len(sys.argv) > 1:
+        candidates = sys.argv[1:]
+    else:
+        candidates = ([USERNAME] if USERNAME else []) + EXTRA_USERNAMES
+    usernames = []
+    seen = set()
+    for username in candidates:
+        if username.lower() not in seen:
+            seen.add(username.lower())
+            usernames.append(username)
+    return usernames
+
+def sync_user_process(username, requests_per_minute, print_lock):
+    """Run one account's sync in a child process, prefixing its output with the username."""
+    env = dict(os.environ)
+    env["LASTFM_REQUESTS_PER_MINUTE"] = str(requests_per_minute)
+    env["PYTHONUNBUFFERED"] = "1"
+    env["PYTHONIOENCODING"] = "utf-8"
+    # Text mode turns the children's "\r" progress updates into separate lines,
+    # so parallel syncs no longer overwrite each other in one console
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), username],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL,
+        encoding="utf-8",
+        errors="replace"
+    )
+    for line in process.stdout:
+        line = line.rstrip("\n")
+        if line.strip():
+            with print_lock:
+                print(f"[{username}] {line}", flush=True)
+    process.wait()
+    with print_lock:
+        status = "✓" if process.returncode == 0 else "!"
+        print(f"[{status}] Sync finished for {username} (exit code {process.returncode})")
+    return process.returncode
+
+def sync_all_users(usernames):
+    """Sync accounts in child processes, at most PARALLEL_SYNCS at a time.
+
+    Every account writes to its own DB shard. The API key's request budget
+    is split evenly between the syncs that run at the same time.
+    """
+    workers = min(PARALLEL_SYNCS, len(usernames))
+    requests_per_minute = max(REQUESTS_PER_MINUTE // workers, 1)
+    print(f"[👥] Syncing {len(usernames)} accounts, {workers} at a time "
+          f"({requests_per_minute} requests/minute each): {', '.join(usernames)}")
+    print_lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for username in usernames:
+            pool.submit(sync_user_process, username, requests_per_minute, print_lock)
+
 def main():
-    show_latest_db_played_time()
-    user = network.get_user(USERNAME)
+    usernames = get_usernames()
+    if len(usernames) > 1:
+        sync_all_users(usernames)
+        return
+
+    username = usernames[0]
+    print(f"[👤] Last.fm account: {username}")
+    if USERNAME and username.lower() == USERNAME.lower() and scrobble_db.adopt_legacy_db(username):
+        print("[📦] Copied existing database into this account's shard")
+    db_path = scrobble_db.get_db_path(username)
+
+    show_latest_db_played_time(db_path)
+    user = network.get_user(username)
     
     # Try to get loved tracks once at the start
     try:
@@ -264,7 +347,7 @@ def main():
 
     while True:
         # Get the next 24-hour range to process
-        start_ts, end_ts, last_update = get_next_time_range()
+        start_ts, end_ts, last_update = get_next_time_range(db_path)
         
         # If no more time ranges to process, we're done
         if start_ts is None or end_ts is None:
@@ -283,11 +366,11 @@ def main():
             final_scrobbles = process_scrobbles(raw_scrobbles, loved_tracks)
             
             if final_scrobbles:
-                csv_filename = f"scrobbles ({day_str}).csv"
+                csv_filename = f"scrobbles ({username}) ({day_str}).csv"
                 save_csv(final_scrobbles, csv_filename)
                 
                 print("\n[📥] Updating database...")
-                subprocess.run(["python", os.path.join(BASE_DIR, "2_CSV_to_DataBase.py"), csv_filename])
+                subprocess.run(["python", os.path.join(BASE_DIR, "2_CSV_to_DataBase.py"), csv_filename, username])
                 print(f"[✓] Added {len(final_scrobbles)} tracks for {day_str}")
             else:
                 print(f"[ℹ️] No valid scrobbles found for {day_str}")
@@ -1,15 +1,15 @@
 import sys
 import os
-import sqlite3
 import csv
 from datetime import datetime
 from tqdm import tqdm
 from send2trash import send2trash
 
-# Base paths
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "..", "DataBases", "All_Scrobble_DataBase.db")
-LOG_DIR = os.path.join(BASE_DIR, "..", "Logs")  # 🔧 Fixed log path
+# Include parent directory in sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Logic import scrobble_db
+from Logic.import_log import ImportLog
 
 def load_csv(csv_path):
     data = []
@@ -29,28 +29,16 @@ def load_csv(csv_path):
                 continue
     return data, for_time_range
 
-def connect_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS scrobbles (
-            `Played Time` TEXT,
-            `Artist` TEXT,
-            `Track Title` TEXT,
-            `Loved` INTEGER,
-            `Playcount` INTEGER
-        );
-    """)
-    return conn
+def connect_db(username=None):
+    return scrobble_db.connect(username)
 
 def fetch_db_data(conn):
     cursor = conn.cursor()
     cursor.execute("SELECT `Played Time`, `Artist`, `Track Title`, `Loved`, `Playcount` FROM scrobbles")
     return cursor.fetchall()
 
-def merge_and_save(csv_data, db_data, conn):
+def merge_and_save(csv_data, db_data, conn, import_log):
     merged = {}
-    new_entries = []
-    existing_entries = []
 
     for row in db_data:
         key = (row[1], row[2])  # (Artist, Track Title)
@@ -67,9 +55,8 @@ def merge_and_save(csv_data, db_data, conn):
         csv_time = row["Parsed Time"]
         if key not in merged:
             merged[key] = row
-            new_entries.append(row)
+            import_log.entry("new", row)
         else:
-            existing_entries.append(row)
             try:
                 db_time = datetime.strptime(merged[key]["Played Time"], "%Y-%m-%d %H:%M:%S")
             except ValueError:
@@ -82,6 +69,9 @@ def merge_and_save(csv_data, db_data, conn):
             merged[key]["Loved"] = max(merged[key]["Loved"], row["Loved"])
             if time_diff > 60:
                 merged[key]["Playcount"] += row["Playcount"]
+                import_log.entry("merged", row)
+            else:
+                import_log.entry("skipped", row)
 
     cursor = conn.cursor()
     cursor.execute("DELETE FROM scrobbles")
@@ -97,7 +87,6 @@ def merge_and_save(csv_data, db_data, conn):
             row["Playcount"]
         ))
     conn.commit()
-    return new_entries, existing_entries
 
 def print_latest_played_time(conn):
     cursor = conn.cursor()
@@ -117,77 +106,13 @@ def print_latest_played_time(conn):
         print("\n[📅] Latest played time in database:")
         print(latest.strftime("%d %B %Y  %H:%M"))
 
-def write_log(csv_path, new_entries, existing_entries, time_range):
-    """Write session log as an HTML file under ./Logs/ folder."""
-    log_root = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Logs")
-    os.makedirs(log_root, exist_ok=True)
-
-    now = datetime.now()
-    now_str = now.strftime("%d %B %Y %H:%M:%S")
-    safe_time = now.strftime("%d %B %Y %H-%M-%S")
-
-    if time_range:
-        start = min(time_range).strftime("%d %B %Y")
-        end = max(time_range).strftime("%d %B %Y")
-        range_label = f"{start} to {end}"
-    else:
-        range_label = "all time"
-
-    filename = f"Log ({safe_time}) - {range_label}.html"
-    log_path = os.path.join(log_root, filename)
-
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <title>Last.fm Merge Log - {range_label}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; padding: 20px; background: #f9f9f9; }}
-        h1 {{ color: #333; }}
-        table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }}
-        th, td {{ border: 1px solid #ccc; padding: 8px; text-align: left; }}
-        th {{ background-color: #f0f0f0; }}
-        .section {{ margin-top: 30px; }}
-    </style>
-</head>
-<body>
-    <h1>🎵 Last.fm Scrobble Merge Log</h1>
-    <p><strong>Log created on:</strong> {now_str}</p>
-    <p><strong>Time range:</strong> {range_label}</p>
-
-    <div class="section">
-        <h2>✅ New Entries Added</h2>
-        {"<p>None</p>" if not new_entries else ""}
-        <table>
-            <tr><th>Played Time</th><th>Artist</th><th>Track Title</th><th>Loved</th></tr>
-            {''.join(f"<tr><td>{r['Played Time']}</td><td>{r['Artist']}</td><td>{r['Track Title']}</td><td>{r['Loved']}</td></tr>" for r in new_entries)}
-        </table>
-    </div>
-
-    <div class="section">
-        <h2>♻️ Existing Entries Merged or Skipped</h2>
-        {"<p>None</p>" if not existing_entries else ""}
-        <table>
-            <tr><th>Played Time</th><th>Artist</th><th>Track Title</th><th>Loved</th></tr>
-            {''.join(f"<tr><td>{r['Played Time']}</td><td>{r['Artist']}</td><td>{r['Track Title']}</td><td>{r['Loved']}</td></tr>" for r in existing_entries)}
-        </table>
-    </div>
-</body>
-</html>
-"""
-
-    with open(log_path, "w", encoding="utf-8") as f:
-        f.write(html)
-
-    print(f"[📝] Log written to: {log_path}")
-
-
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python 2_CSV_2_SQLite.py <csv_file>")
+        print("Usage: python 2_CSV_to_DataBase.py <csv_file> [lastfm_username]")
         return
 
     csv_path = sys.argv[1]
+    username = sys.argv[2] if len(sys.argv) > 2 else None
     if not os.path.exists(csv_path):
         print(f"[✗] CSV file not found: {csv_path}")
         return
@@ -195,23 +120,24 @@ def main():
     print(f"[→] Loading CSV: {os.path.basename(csv_path)}")
     csv_data, time_range = load_csv(csv_path)
 
-    print("[→] Connecting to database...")
-    conn = connect_db()
+    print(f"[→] Connecting to database: {os.path.basename(scrobble_db.get_db_path(username))}")
+    conn = connect_db(username)
 
     print("[→] Fetching existing data...")
     db_data = fetch_db_data(conn)
 
     print("[→] Merging and saving to database...")
-    new_entries, existing_entries = merge_and_save(csv_data, db_data, conn)
+    with ImportLog(csv_path, username, time_range) as import_log:
+        merge_and_save(csv_data, db_data, conn, import_log)
 
     print_latest_played_time(conn)
     conn.close()
 
+    counts = import_log.counts
     print("\n[📊] Summary:")
-    print(f"   ✅ New entries added: {len(new_entries)}")
-    print(f"   ♻️  Existing entries merged/skipped: {len(existing_entries)}")
-
-    write_log(csv_path, new_entries, existing_entries, time_range)
+    print(f"   ✅ New entries added: {counts['new']}")
+    print(f"   ♻️  Existing entries merged/skipped: {counts['merged']}/{counts['skipped']}")
+    print(f"[📝] Import logged to: {import_log.log_path}")
 
     try:
         send2trash(csv_path)
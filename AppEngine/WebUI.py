@@ -1,16 +1,19 @@
 import os
 import sys
 import json
-from flask import Flask, render_template, request, jsonify
+import secrets
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for
 from spotipy import Spotify
-from spotipy.oauth2 import SpotifyOAuth
+from spotipy.oauth2 import SpotifyOAuth, SpotifyOauthError
+from spotipy.cache_handler import FlaskSessionCacheHandler
 from dotenv import load_dotenv
+from markupsafe import escape
 
 # Include parent directory in sys.path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-# Import playlist logic
-from Logic import playlist_sorter
+# Import playlist and database logic
+from Logic import playlist_sorter, scrobble_db, import_log
 
 # Load environment variables from .env
 load_dotenv()
@@ -21,18 +24,66 @@ static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "stat
 
 # Create Flask app with correct template and static folder paths
 app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
-
-# Setup Spotify client with OAuth
-sp = Spotify(auth_manager=SpotifyOAuth(
-    client_id=os.getenv("SPOTIPY_CLIENT_ID"),
-    client_secret=os.getenv("SPOTIPY_CLIENT_SECRET"),
-    redirect_uri=os.getenv("SPOTIPY_REDIRECT_URI"),
-    scope="playlist-read-private playlist-modify-private playlist-modify-public"
-))
-
-# Path to your SQLite database
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.abspath(os.path.join(BASE_DIR, "..", "DataBases", "All_Scrobble_DataBase.db"))
+# Signs the session cookie that holds each listener's Spotify token
+app.secret_key = os.getenv("FLASK_SECRET_KEY") or os.urandom(32)
+
+SPOTIFY_SCOPE = "playlist-read-private playlist-modify-private playlist-modify-public"
+
+# Playcount source value for the cross-user aggregate
+COMBINED_SOURCE = "__combined__"
+
+LOG_RUNS_PER_PAGE = 20
+LOG_ENTRIES_PER_PAGE = 100
+
+
+def get_auth_manager():
+    """Spotify OAuth manager whose token cache lives in the current Flask session."""
+    # Per-session state ties the authorization code back to the browser that asked for it
+    if "oauth_state" not in session:
+        session["oauth_state"] = secrets.token_urlsafe(16)
+    return SpotifyOAuth(
+        client_id=os.getenv("SPOTIPY_CLIENT_ID"),
+        client_secret=os.getenv("SPOTIPY_CLIENT_SECRET"),
+        redirect_uri=os.getenv("SPOTIPY_REDIRECT_URI"),
+        scope=SPOTIFY_SCOPE,
+        cache_handler=FlaskSessionCacheHandler(session),
+        state=session["oauth_state"],
+        show_dialog=True
+    )
+
+
+def get_spotify():
+    """Spotify client for the signed-in listener, or None if they have no token yet."""
+    auth_manager = get_auth_manager()
+    if not auth_manager.validate_token(auth_manager.cache_handler.get_cached_token()):
+        return None
+    return Spotify(auth_manager=auth_manager)
+
+
+def default_lastfm_user(lastfm_users):
+    """LASTFM_USERNAME if it has a shard, else the first user; "" when there are no shards."""
+    default_user = scrobble_db.safe_username(os.getenv("LASTFM_USERNAME") or "")
+    if default_user in lastfm_users:
+        return default_user
+    return lastfm_users[0] if lastfm_users else ""
+
+
+def load_playcounts_for(source):
+    """Playcounts for one Last.fm user, or summed across all users for COMBINED_SOURCE."""
+    if source == COMBINED_SOURCE:
+        playcounts = {}
+        # Shards come in batches of attached databases; sum each batch into one dict
+        for conn in scrobble_db.connect_combined():
+            playlist_sorter.load_combined_playcounts(conn, playcounts)
+        return playcounts
+
+    # No shards yet means single-account mode on the legacy database
+    if not scrobble_db.list_users():
+        source = None
+    db_path = scrobble_db.get_db_path(source)
+    if not os.path.exists(db_path):
+        return {}
+    return playlist_sorter.load_playcounts(db_path)
 
 
 def fetch_all_user_playlists(sp, user_id):
@@ -54,8 +105,42 @@ def fetch_all_user_playlists(sp, user_id):
     return all_playlists
 
 
+def sign_in_failed(message, status=400):
+    """Explain a failed Spotify sign-in and offer a clean retry.
+
+    A fresh state is issued for the retry, and the link drops the callback
+    query string so a reload does not repeat the failure.
+    """
+    session.pop("oauth_state", None)
+    return (
+        f"<p>Spotify sign-in failed: {escape(message)}</p>"
+        f"<p><a href=\"{url_for('index')}\">Try again</a></p>"
+    ), status
+
+
 @app.route("/")
 def index():
+    auth_manager = get_auth_manager()
+
+    # Spotify redirects back here with ?error=... if the listener declined access
+    if request.args.get("error"):
+        return sign_in_failed(request.args["error"], status=200)
+
+    # Spotify redirects back here with an authorization code after sign-in
+    if request.args.get("code"):
+        if not secrets.compare_digest(request.args.get("state", ""), session["oauth_state"]):
+            return sign_in_failed("state mismatch")
+        try:
+            auth_manager.get_access_token(request.args["code"])
+        except SpotifyOauthError as e:
+            # e.g. the same code reused when the callback page is reloaded
+            return sign_in_failed(str(e))
+        return redirect(url_for("index"))
+
+    sp = get_spotify()
+    if sp is None:
+        return redirect(auth_manager.get_authorize_url())
+
     user_id = sp.current_user()["id"]
     playlists_raw = fetch_all_user_playlists(sp, user_id)
 
@@ -85,15 +170,36 @@ def index():
     # Sort playlists alphabetically by name
     sorted_playlists = sorted(cleaned_playlists, key=lambda x: x["name"].lower())
 
-    return render_template("index.html", playlists=sorted_playlists)
+    lastfm_users = scrobble_db.list_users()
+    selected_source = session.get("lastfm_source") or default_lastfm_user(lastfm_users)
+
+    return render_template(
+        "index.html",
+        playlists=sorted_playlists,
+        lastfm_users=lastfm_users,
+        selected_source=selected_source,
+        combined_source=COMBINED_SOURCE
+    )
+
+
+@app.route("/logout")
+def logout():
+    session.clear()
+    return redirect(url_for("index"))
 
 
 @app.route("/sort_playlist", methods=["POST"])
 def sort_playlist():
+    sp = get_spotify()
+    if sp is None:
+        return jsonify({"status": "error", "message": "Not signed in to Spotify"}), 401
+
     playlist_id = request.json.get("playlist_id")
+    source = request.json.get("source") or ""
+    session["lastfm_source"] = source
 
     tracks = playlist_sorter.extract_tracks_from_playlist(sp, playlist_id)
-    playcounts = playlist_sorter.load_playcounts(DB_PATH)
+    playcounts = load_playcounts_for(source)
     sorted_tracks = playlist_sorter.sort_tracks_by_playcount(tracks, playcounts, descending=True)
 
     return jsonify(sorted_tracks)
@@ -101,6 +207,10 @@ def sort_playlist():
 
 @app.route("/apply_sort", methods=["POST"])
 def apply_sort():
+    sp = get_spotify()
+    if sp is None:
+        return jsonify({"status": "error", "message": "Not signed in to Spotify"}), 401
+
     playlist_id = request.json.get("playlist_id")
     track_ids = request.json.get("track_ids")
 
@@ -115,6 +225,59 @@ def apply_sort():
     return jsonify({"status": "success", "message": "Playlist reordered!"})
 
 
+def selected_log_user(lastfm_users):
+    """Account whose import log to show; None means the shared (no username) log.
+
+    An explicit empty ?user= selects the shared log, which holds imports run
+    before accounts had their own shards.
+    """
+    user = request.args.get("user")
+    if user is None:
+        return default_lastfm_user(lastfm_users) or None
+    return user or None
+
+
+@app.route("/logs")
+def logs():
+    """Paged history of CSV imports, read from the import run index."""
+    lastfm_users = scrobble_db.list_users()
+    user = selected_log_user(lastfm_users)
+    page = max(request.args.get("page", 1, type=int), 1)
+
+    runs, total = import_log.read_runs(user, page=page, per_page=LOG_RUNS_PER_PAGE)
+    return render_template(
+        "logs.html",
+        runs=runs,
+        run=None,
+        entries=None,
+        user=user,
+        lastfm_users=lastfm_users,
+        has_shared_log=os.path.exists(import_log.get_index_path(None)),
+        page=page,
+        page_count=max((total + LOG_RUNS_PER_PAGE - 1) // LOG_RUNS_PER_PAGE, 1)
+    )
+
+
+@app.route("/logs/<run_id>")
+def log_run(run_id):
+    """Paged track entries of a single import run."""
+    lastfm_users = scrobble_db.list_users()
+    user = selected_log_user(lastfm_users)
+    page = max(request.args.get("page", 1, type=int), 1)
+
+    entries, total = import_log.read_entries(run_id, user, page=page, per_page=LOG_ENTRIES_PER_PAGE)
+    return render_template(
+        "logs.html",
+        runs=None,
+        run=run_id,
+        entries=entries,
+        user=user,
+        lastfm_users=lastfm_users,
+        page=page,
+        page_count=max((total + LOG_ENTRIES_PER_PAGE - 1) // LOG_ENTRIES_PER_PAGE, 1)
+    )
+
+
 if __name__ == "__main__":
     import webbrowser
     webbrowser.open("http://127.0.0.1:5000")
@@ -0,0 +1,313 @@
+import os
+import json
+import uuid
+import sqlite3
+from datetime import datetime
+
+from Logic import scrobble_db
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LOG_DIR = os.path.join(BASE_DIR, "Logs")
+
+# Rotate the active log once it passes this size, keeping BACKUP_COUNT older files
+MAX_LOG_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+
+# Every record starts with its type, so read_entries can skip other lines without parsing them
+ENTRY_PREFIX = '{"type": "entry"'
+RUN_END_PREFIX = '{"type": "run_end"'
+
+
+def get_log_path(username=None):
+    """Return the JSON Lines import log for a Last.fm user (shared log when no user)."""
+    if not username:
+        return os.path.join(LOG_DIR, "import_runs.jsonl")
+    return os.path.join(LOG_DIR, f"import_runs ({scrobble_db.safe_username(username)}).jsonl")
+
+
+def get_index_path(username=None):
+    """Return the SQLite index of import runs that /logs pages through."""
+    return os.path.splitext(get_log_path(username))[0] + ".db"
+
+
+def _connect_index(username=None):
+    conn = sqlite3.connect(get_index_path(username), timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS import_runs (
+            `run_id` TEXT PRIMARY KEY,
+            `started` TEXT,
+            `finished` TEXT,
+            `csv` TEXT,
+            `user` TEXT,
+            `range_start` TEXT,
+            `range_end` TEXT,
+            `status` TEXT,
+            `error` TEXT,
+            `new` INTEGER,
+            `merged` INTEGER,
+            `skipped` INTEGER,
+            `log_rotation` INTEGER,
+            `log_offset` INTEGER
+        );
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(import_runs)")}
+    for column in ("log_rotation", "log_offset"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE import_runs ADD COLUMN `{column}` INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS import_runs_started ON import_runs (`started`)")
+    # Number of rotations so far; a run logged at rotation r now lives in log file
+    # suffix (rotations - r), so entries can be found by seeking, not scanning
+    conn.execute("CREATE TABLE IF NOT EXISTS log_state (`rotations` INTEGER)")
+    if conn.execute("SELECT COUNT(*) FROM log_state").fetchone()[0] == 0:
+        conn.execute("INSERT INTO log_state (`rotations`) VALUES (0)")
+        conn.commit()
+    return conn
+
+
+def _get_rotations(conn):
+    return conn.execute("SELECT `rotations` FROM log_state").fetchone()[0]
+
+
+class ImportLog:
+    """Append-only log of one CSV import, written record by record during the merge."""
+
+    def __init__(self, csv_path, username=None, time_range=None):
+        self.run_id = uuid.uuid4().hex
+        self.csv_path = csv_path
+        self.time_range = time_range
+        self.username = username
+        self.log_path = get_log_path(username)
+        self.counts = {"new": 0, "merged": 0, "skipped": 0}
+        self._file = None
+        self._size = 0
+        self._rotation_failed = False
+        self._rotations = 0
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self._open()
+        try:
+            conn = _connect_index(self.username)
+            try:
+                self._rotations = _get_rotations(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"\n[!] Could not read import run index: {e}")
+        # Where this run's records start, so read_entries can seek straight to them
+        log_offset = self._size
+        time_range = None
+        if self.time_range:
+            time_range = [min(self.time_range).strftime("%Y-%m-%d %H:%M:%S"),
+                          max(self.time_range).strftime("%Y-%m-%d %H:%M:%S")]
+        self._write({
+            "type": "run_start",
+            "csv": os.path.basename(self.csv_path),
+            "user": self.username,
+            "range": time_range,
+        })
+        self._index("""
+            INSERT INTO import_runs (`run_id`, `started`, `csv`, `user`, `range_start`, `range_end`, `status`,
+                                     `log_rotation`, `log_offset`)
+            VALUES (?, ?, ?, ?, ?, ?, 'running', ?, ?)
+        """, (
+            self.run_id,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            os.path.basename(self.csv_path),
+            self.username,
+            time_range[0] if time_range else None,
+            time_range[1] if time_range else None,
+            self._rotations,
+            log_offset
+        ))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        status = "ok" if exc_type is None else "failed"
+        error = str(exc) if exc is not None else None
+        self._index("""
+            UPDATE import_runs SET `finished` = ?, `status` = ?, `error` = ?, `new` = ?, `merged` = ?, `skipped` = ?
+            WHERE `run_id` = ?
+        """, (
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            status,
+            error,
+            self.counts["new"],
+            self.counts["merged"],
+            self.counts["skipped"],
+            self.run_id
+        ))
+        if self._file is None or self._file.closed:
+            return False
+        self._write({
+            "type": "run_end",
+            "user": self.username,
+            "status": status,
+            "error": error,
+            "counts": self.counts,
+        })
+        self._file.close()
+        self._file = None
+        return False
+
+    def entry(self, status, row):
+        """Record one merged track; status is "new", "merged" or "skipped"."""
+        self.counts[status] += 1
+        self._write({
+            "type": "entry",
+            "status": status,
+            "played_time": row["Played Time"],
+            "artist": row["Artist"],
+            "title": row["Track Title"],
+            "loved": row["Loved"],
+            "playcount": row["Playcount"],
+        })
+
+    def _index(self, sql, params):
+        """Update this run's row in the run index; failures only cost the /logs listing."""
+        try:
+            conn = _connect_index(self.username)
+            try:
+                conn.execute(sql, params)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"\n[!] Could not update import run index: {e}")
+
+    def _open(self):
+        # newline="\n" keeps the on-disk size equal to the bytes counted in _write
+        self._file = open(self.log_path, "a", encoding="utf-8", newline="\n")
+        self._size = os.path.getsize(self.log_path)
+
+    def _write(self, record):
+        if self._file is None:
+            return
+        record = {"type": record.pop("type"), "run_id": self.run_id,
+                  "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **record}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._file.write(line)
+        # A running count instead of tell(), which would flush the buffer on every record
+        self._size += len(line.encode("utf-8"))
+        if self._size >= MAX_LOG_BYTES and not self._rotation_failed:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        try:
+            for i in range(BACKUP_COUNT - 1, 0, -1):
+                older = f"{self.log_path}.{i}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.log_path}.{i + 1}")
+            os.replace(self.log_path, f"{self.log_path}.1")
+            self._index("UPDATE log_state SET `rotations` = `rotations` + 1", ())
+        except OSError as e:
+            # e.g. the web UI holds the log open on Windows; keep appending to the active file
+            print(f"\n[!] Could not rotate import log, continuing without rotation: {e}")
+            self._rotation_failed = True
+        try:
+            self._open()
+        except OSError as e:
+            print(f"\n[!] Could not reopen import log, the rest of this import is not logged: {e}")
+            self._file = None
+
+
+def read_runs(username=None, page=1, per_page=20):
+    """Return (runs, total) for one page of import runs, newest first."""
+    if not os.path.exists(get_index_path(username)):
+        return [], 0
+    conn = _connect_index(username)
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM import_runs").fetchone()[0]
+        rows = conn.execute("""
+            SELECT `run_id`, `started`, `finished`, `csv`, `user`, `range_start`, `range_end`,
+                   `status`, `error`, `new`, `merged`, `skipped`
+            FROM import_runs ORDER BY `started` DESC, rowid DESC LIMIT ? OFFSET ?
+        """, (per_page, (page - 1) * per_page)).fetchall()
+    finally:
+        conn.close()
+
+    runs = []
+    for run_id, started, finished, csv, user, range_start, range_end, status, error, new, merged, skipped in rows:
+        runs.append({
+            "run_id": run_id,
+            "started": started,
+            "finished": finished,
+            "csv": csv,
+            "user": user,
+            "range": [range_start, range_end] if range_start else None,
+            "status": status,
+            "error": error,
+            "counts": {"new": new, "merged": merged, "skipped": skipped} if finished else None,
+        })
+    return runs, total
+
+
+def read_entries(run_id, username=None, page=1, per_page=100):
+    """Return (entries, total) for one page of a run's merged tracks, in merge order.
+
+    Seeks to the run's first record using the offset kept in the run index and
+    reads forward only until the page is filled. entries is None when the run's
+    records have been rotated out of the retained log files.
+    """
+    if not os.path.exists(get_index_path(username)):
+        return None, 0
+    conn = _connect_index(username)
+    try:
+        row = conn.execute("""
+            SELECT `log_rotation`, `log_offset`, `finished`, `new`, `merged`, `skipped`
+            FROM import_runs WHERE `run_id` = ?
+        """, (run_id,)).fetchone()
+        rotations = _get_rotations(conn)
+    finally:
+        conn.close()
+    if row is None or row[0] is None:
+        return None, 0
+    log_rotation, log_offset, finished, new, merged, skipped = row
+
+    # The run starts in log suffix (rotations - log_rotation) and may continue into newer files
+    log_path = get_log_path(username)
+    suffix = rotations - log_rotation
+    if suffix > BACKUP_COUNT:
+        return None, 0
+    files = [f"{log_path}.{i}" if i else log_path for i in range(suffix, -1, -1)]
+    if not os.path.exists(files[0]):
+        return None, 0
+
+    marker = f'"run_id": "{run_id}"'
+    start = (page - 1) * per_page
+    entries = []
+    seen = 0
+    more = False
+    done = False
+    for n, log_file in enumerate(files):
+        if done or not os.path.exists(log_file):
+            break
+        with open(log_file, "rb") as f:
+            if n == 0:
+                f.seek(log_offset)
+            for raw in f:
+                line = raw.decode("utf-8", errors="replace")
+                if marker not in line:
+                    continue
+                if line.startswith(RUN_END_PREFIX):
+                    done = True
+                    break
+                if not line.startswith(ENTRY_PREFIX):
+                    continue
+                if seen >= start + per_page:
+                    more = True
+                    done = True
+                    break
+                if seen >= start:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        pass
+                seen += 1
+
+    if finished:
+        total = (new or 0) + (merged or 0) + (skipped or 0)
+    else:
+        total = seen + (1 if more else 0)
+    return entries, total
@@ -8,6 +8,16 @@ def load_playcounts(db_path):
     conn.close()
     return {(artist.lower(), title.lower()): count for artist, title, count in data}
 
+def load_combined_playcounts(conn, playcounts=None):
+    cursor = conn.cursor()
+    cursor.execute("SELECT `Artist`, `Track Title`, SUM(`Playcount`) FROM combined_scrobbles GROUP BY `Artist`, `Track Title`")
+    if playcounts is None:
+        playcounts = {}
+    for artist, title, count in cursor.fetchall():
+        key = (artist.lower(), title.lower())
+        playcounts[key] = playcounts.get(key, 0) + count
+    return playcounts
+
 def extract_tracks_from_playlist(sp, playlist_id):
     tracks = []
     offset = 0
@@ -0,0 +1,121 @@
+import os
+import re
+import sqlite3
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DB_DIR = os.path.join(BASE_DIR, "DataBases")
+# Single-account database, still used when no Last.fm username is given
+LEGACY_DB_PATH = os.path.join(DB_DIR, "All_Scrobble_DataBase.db")
+# One shard per Last.fm user, so syncs for different users never share a writer lock
+SHARD_DIR = os.path.join(DB_DIR, "Users")
+SHARD_SUFFIX = "_Scrobble_DataBase.db"
+
+# SQLite refuses more than 10 attached databases with its default build limits,
+# so combined queries attach shards in batches of this size
+MAX_ATTACHED = 10
+
+
+def safe_username(username):
+    """Username reduced to characters that are safe in a filename.
+
+    Last.fm usernames are case-insensitive, so the result is lowercased to
+    give one shard per account even on case-insensitive filesystems.
+    """
+    return re.sub(r"[^a-z0-9_.-]", "_", username.strip().lower())
+
+
+def _shard_filename(username):
+    return f"{safe_username(username)}{SHARD_SUFFIX}"
+
+
+def get_db_path(username=None):
+    """Return the database path for a Last.fm user (legacy DB when no user)."""
+    if not username:
+        return LEGACY_DB_PATH
+    return os.path.join(SHARD_DIR, _shard_filename(username))
+
+
+def list_users():
+    """List Last.fm usernames that have a shard on disk."""
+    users = set()
+    if os.path.isdir(SHARD_DIR):
+        for filename in os.listdir(SHARD_DIR):
+            if filename.endswith(SHARD_SUFFIX):
+                users.add(filename[:-len(SHARD_SUFFIX)])
+    return sorted(users)
+
+
+def _ensure_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scrobbles (
+            `Played Time` TEXT,
+            `Artist` TEXT,
+            `Track Title` TEXT,
+            `Loved` INTEGER,
+            `Playcount` INTEGER
+        );
+    """)
+
+
+def connect(username=None):
+    """Open a user's shard (the legacy database when no user), creating it if needed.
+
+    Shards use the WAL journal so the web UI can read while a sync for the
+    same user is writing. The legacy database keeps its rollback journal.
+    """
+    db_path = get_db_path(username)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    if username:
+        conn.execute("PRAGMA journal_mode=WAL")
+    _ensure_schema(conn)
+    conn.commit()
+    return conn
+
+
+def connect_combined():
+    """Yield in-memory connections that together attach every user shard.
+
+    Shards are attached in batches of at most MAX_ATTACHED; each connection
+    exposes a temporary `combined_scrobbles` view over the batch's rows.
+    Callers aggregate per batch and add the results up.
+    """
+    paths = [get_db_path(u) for u in list_users()]
+    for i in range(0, len(paths), MAX_ATTACHED):
+        conn = _attach_batch(paths[i:i + MAX_ATTACHED])
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def _attach_batch(paths):
+    conn = sqlite3.connect(":memory:")
+    selects = []
+    for i, db_path in enumerate(paths):
+        alias = f"user_{i}"
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (db_path,))
+        selects.append(f"SELECT `Played Time`, `Artist`, `Track Title`, `Loved`, `Playcount` FROM {alias}.scrobbles")
+    conn.execute(f"CREATE TEMP VIEW combined_scrobbles AS {' UNION ALL '.join(selects)}")
+    return conn
+
+
+def adopt_legacy_db(username):
+    """Copy the single-account database into a user's shard if it has none yet.
+
+    Returns True when the legacy data was copied.
+    """
+    db_path = get_db_path(username)
+    if not username or os.path.exists(db_path) or not os.path.exists(LEGACY_DB_PATH):
+        return False
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    source = sqlite3.connect(LEGACY_DB_PATH)
+    target = sqlite3.connect(db_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    # Switch the copy to WAL like any freshly created shard
+    connect(username).close()
+    return True
@@ -5,6 +5,7 @@ const tracksList = document.getElementById('tracks-list');
 const resultList = document.getElementById('result-list');
 const applyBtn = document.getElementById('apply-btn');
 const optionButtons = document.querySelectorAll('.option-btn');
+const sourceSelect = document.getElementById('playcount-source');
 
 let currentPlaylistId = null;
 let currentTracks = [];
@@ -47,7 +48,7 @@ async function fetchTracks(playlistId) {
     const res = await fetch('/sort_playlist', {
       method: 'POST',
       headers: {'Content-Type': 'application/json'},
-      body: JSON.stringify({playlist_id: playlistId})
+      body: JSON.stringify({playlist_id: playlistId, source: sourceSelect.value})
     });
     const data = await res.json();
     currentTracks = data;
@@ -125,6 +126,11 @@ applyBtn.onclick = async () => {
   }
 };
 
+// 👥 Playcount Source Change (reload counts for the current playlist)
+sourceSelect.addEventListener('change', () => {
+  if (currentPlaylistId) selectPlaylist(currentPlaylistId);
+});
+
 // 🕹 Sort Option Button Logic
 optionButtons.forEach(btn => {
   btn.onclick = () => {